@@ -2,21 +2,37 @@ import os
 import datetime
 import base64
 import json
+import queue
+import threading
+import time
 from io import BytesIO
+from urllib.parse import quote
 
 # ---------- CONFIGURAZIONE ----------
 SECRET_JOIN_CODE = os.environ.get("FIUGGI_CODE", "FIUGGI2025")
 PING_INTERVAL_SEC = 30
+AUTHOR_PAGE_SIZE = 20
+FEED_BATCH_SIZE = 50
+
+# SQLite (solo se DATABASE_URL non è impostata)
+DB_PATH = os.environ.get("FIUGGI_DB_PATH", "/tmp/fiuggigram.db")
+SQLITE_TUNED = os.environ.get("FIUGGI_SQLITE_TUNED", "1") == "1"
+SQLITE_MMAP_SIZE = int(os.environ.get("FIUGGI_SQLITE_MMAP", 64 * 1024 * 1024))
+SQLITE_CACHE_KB = int(os.environ.get("FIUGGI_SQLITE_CACHE_KB", 16 * 1024))
+SQLITE_BUSY_MS = int(os.environ.get("FIUGGI_SQLITE_BUSY_MS", 5000))
+SQLITE_STMT_CACHE = 256
+SQLITE_CHECKPOINT_SEC = 30
+SQLITE_WRITE_TIMEOUT_SEC = 30
 # ------------------------------------
 
-from flask import Flask, request, redirect, url_for, send_from_directory, jsonify
+from flask import Flask, Response, request, redirect, url_for, send_from_directory, jsonify, stream_with_context
+from markupsafe import escape
 
 # ✅ Usa PostgreSQL se DATABASE_URL è impostata
 DATABASE_URL = os.environ.get("DATABASE_URL")
 
 if DATABASE_URL:
     import psycopg2
-    from psycopg2.extras import RealDictCursor
     DB_TYPE = "postgres"
 else:
     import sqlite3
@@ -24,6 +40,17 @@ else:
 
 app = Flask(__name__)
 
+# Aggregati per autore: post, risposte scritte e like ricevuti
+AUTHOR_STATS_BACKFILL = """
+    INSERT INTO author_stats (username, post_count, reply_count, like_total)
+    SELECT p.username,
+           SUM(CASE WHEN p.parent_id IS NULL THEN 1 ELSE 0 END),
+           SUM(CASE WHEN p.parent_id IS NULL THEN 0 ELSE 1 END),
+           (SELECT COUNT(*) FROM likes l JOIN posts q ON q.id = l.post_id WHERE q.username = p.username)
+    FROM posts p
+    GROUP BY p.username
+"""
+
 def init_db():
     if DB_TYPE == "postgres":
         conn = psycopg2.connect(DATABASE_URL)
@@ -45,10 +72,24 @@ def init_db():
                 PRIMARY KEY (post_id, ip_hash)
             )
         """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_username_ts ON posts (username, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_posts_parent_ts ON posts (parent_id, timestamp)")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS author_stats (
+                username TEXT PRIMARY KEY,
+                post_count INTEGER NOT NULL DEFAULT 0,
+                reply_count INTEGER NOT NULL DEFAULT 0,
+                like_total INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Popola le statistiche la prima volta (db già esistenti)
+        cursor.execute("SELECT 1 FROM author_stats LIMIT 1")
+        if cursor.fetchone() is None:
+            cursor.execute(AUTHOR_STATS_BACKFILL)
         conn.commit()
         conn.close()
     else:
-        conn = sqlite3.connect("/tmp/fiuggigram.db")
+        conn = sqlite_connect()
         conn.execute("""
             CREATE TABLE IF NOT EXISTS posts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -66,6 +107,19 @@ def init_db():
                 PRIMARY KEY (post_id, ip_hash)
             )
         """)
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_username_ts ON posts (username, timestamp)")
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_posts_parent_ts ON posts (parent_id, timestamp)")
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS author_stats (
+                username TEXT PRIMARY KEY,
+                post_count INTEGER NOT NULL DEFAULT 0,
+                reply_count INTEGER NOT NULL DEFAULT 0,
+                like_total INTEGER NOT NULL DEFAULT 0
+            )
+        """)
+        # Popola le statistiche la prima volta (db già esistenti)
+        if conn.execute("SELECT 1 FROM author_stats LIMIT 1").fetchone() is None:
+            conn.execute(AUTHOR_STATS_BACKFILL)
         conn.commit()
         conn.close()
 
@@ -73,92 +127,217 @@ def get_client_id():
     ip = request.headers.get("X-Forwarded-For", request.remote_addr)
     return base64.b64encode(ip.encode()).decode()[:12]
 
+def sqlite_connect(readonly=False):
+    if not SQLITE_TUNED:
+        return sqlite3.connect(DB_PATH)
+    # Le connessioni tuned passano tra thread (pool/writer), mai in uso da due insieme
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=SQLITE_BUSY_MS / 1000,
+        check_same_thread=False,
+        cached_statements=SQLITE_STMT_CACHE,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+    conn.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_KB}")
+    conn.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_MS}")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    if readonly:
+        conn.execute("PRAGMA query_only=1")
+    return conn
+
+# ✅ SQLite tuned: letture da un pool di connessioni riusate (la cache degli
+# statement sopravvive tra le richieste), scritture serializzate su un'unica
+# connessione writer protetta da un lock
+_reader_pool = queue.LifoQueue()
+_writer_lock = threading.Lock()
+_writer_conn = None
+_checkpointer_started = False
+
+class PooledConnection:
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args, **kwargs):
+        return self._conn.cursor(*args, **kwargs)
+
+    def commit(self):
+        self._conn.commit()
+
+    def close(self):
+        # Non chiude: torna nel pool (se è ancora sana)
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return
+        try:
+            conn.rollback()
+        except sqlite3.Error:
+            conn.close()
+        else:
+            _reader_pool.put(conn)
+
+def _checkpoint_loop(conn):
+    # PASSIVE non blocca né il writer né i lettori
+    while True:
+        time.sleep(SQLITE_CHECKPOINT_SEC)
+        try:
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
+        except sqlite3.Error:
+            pass
+
+def _open_writer():
+    # Chiamata con _writer_lock preso; se fallisce l'errore arriva al chiamante,
+    # non resta nessuna connessione aperta e la prossima scrittura riprova
+    global _writer_conn, _checkpointer_started
+    conn = sqlite_connect()
+    if not _checkpointer_started:
+        try:
+            checkpoint_conn = sqlite_connect()
+        except Exception:
+            conn.close()
+            raise
+        threading.Thread(target=_checkpoint_loop, args=(checkpoint_conn,), name="fiuggi-checkpoint", daemon=True).start()
+        _checkpointer_started = True
+    _writer_conn = conn
+
+def _drop_writer():
+    # Chiamata con _writer_lock preso
+    global _writer_conn
+    conn, _writer_conn = _writer_conn, None
+    try:
+        conn.close()
+    except sqlite3.Error:
+        pass
+
 def get_db_connection():
     if DB_TYPE == "postgres":
         return psycopg2.connect(DATABASE_URL)
+    elif SQLITE_TUNED:
+        try:
+            conn = _reader_pool.get_nowait()
+        except queue.Empty:
+            conn = sqlite_connect(readonly=True)
+        return PooledConnection(conn)
     else:
-        return sqlite3.connect("/tmp/fiuggigram.db")
+        return sqlite3.connect(DB_PATH)
 
-def fmt_ts(ts):
+def run_write(fn):
+    """Esegue fn(conn) in una transazione di scrittura e ne restituisce il risultato."""
+    if DB_TYPE == "sqlite" and SQLITE_TUNED:
+        # Un solo writer alla volta, eseguito nel thread della richiesta: niente
+        # passaggi di mano a un thread dedicato (costano due cambi di GIL a scrittura)
+        if not _writer_lock.acquire(timeout=SQLITE_WRITE_TIMEOUT_SEC):
+            raise TimeoutError("writer SQLite occupato")
+        try:
+            if _writer_conn is None:
+                _open_writer()
+            try:
+                result = fn(_writer_conn)
+                _writer_conn.commit()
+            except sqlite3.DatabaseError:
+                # Connessione forse compromessa: la prossima scrittura ne apre una nuova
+                _drop_writer()
+                raise
+            except Exception:
+                _writer_conn.rollback()
+                raise
+            return result
+        finally:
+            _writer_lock.release()
+    conn = get_db_connection()
     try:
-        dt = datetime.datetime.fromisoformat(str(ts))
-        now = datetime.datetime.now()
-        diff = now - dt
-        if diff.days == 0:
-            if diff.seconds < 60:
-                return "pochi secondi fa"
-            elif diff.seconds < 3600:
-                m = diff.seconds // 60
-                return f"{m} minuto{'i' if m != 1 else ''} fa"
-            else:
-                h = diff.seconds // 3600
-                return f"{h} ora{'e' if h != 1 else ''} fa"
-        elif diff.days == 1:
-            return "ieri"
-        else:
-            return dt.strftime("%d %b")
-    except:
-        return str(ts)
+        result = fn(conn)
+        conn.commit()
+        return result
+    finally:
+        conn.close()
 
-def render_page(posts, replies_by_post, error=""):
-    theme = request.cookies.get("theme", "auto")
-    theme_attr = f'data-theme="{theme}"' if theme in ("light", "dark") else ''
+def bump_author_stats(cursor, username, posts=0, replies=0, likes=0):
+    # Aggiornato a ogni insert: le pagine autore non devono ricontare nulla
+    sql = """
+        INSERT INTO author_stats (username, post_count, reply_count, like_total)
+        VALUES ({p}, {p}, {p}, {p})
+        ON CONFLICT (username) DO UPDATE SET
+            post_count = author_stats.post_count + excluded.post_count,
+            reply_count = author_stats.reply_count + excluded.reply_count,
+            like_total = author_stats.like_total + excluded.like_total
+    """.format(p="%s" if DB_TYPE == "postgres" else "?")
+    cursor.execute(sql, (username, posts, replies, likes))
 
-    def render_post(pid, username, content, image_path, ts, like_count, is_liked, replies, level=0):
-        indent = "  " * level
-        margin_left = 16 * level
-        border_left = "4px solid #FFD166" if level == 0 else "2px solid #CBD5E1"
-        pad_left = 16 - margin_left if level > 0 else 16
+def author_url(username):
+    return "/u/" + quote(username, safe="")
 
-        img_html = ""
+def make_ts_formatter(now):
+    """Formattatore di timestamp: i limiti delle fasce si calcolano una volta da `now`."""
+    minute_ago = now - datetime.timedelta(minutes=1)
+    hour_ago = now - datetime.timedelta(hours=1)
+    day_ago = now - datetime.timedelta(days=1)
+    two_days_ago = now - datetime.timedelta(days=2)
 
-        reply_input = f'''
-        <div class="reply-form mt-2" id="reply-form-{pid}" style="display:none">
-          <input type="text" class="form-control form-control-sm reply-input"
-                 placeholder="La tua risposta…" maxlength="200"
-                 onkeypress="if(event.key==='Enter') submitReply({pid})">
-          <button class="btn-reply" onclick="submitReply({pid})">➤</button>
-        </div>
-        '''
+    def fmt(ts):
+        try:
+            # Postgres restituisce già datetime, SQLite una stringa ISO
+            dt = ts if isinstance(ts, datetime.datetime) else datetime.datetime.fromisoformat(str(ts))
+            if dt > now or dt <= two_days_ago:
+                return dt.strftime("%d %b")
+            elif dt > minute_ago:
+                return "pochi secondi fa"
+            elif dt > hour_ago:
+                m = (now - dt).seconds // 60
+                return f"{m} minuto{'i' if m != 1 else ''} fa"
+            elif dt > day_ago:
+                h = (now - dt).seconds // 3600
+                return f"{h} ora{'e' if h != 1 else ''} fa"
+            else:
+                return "ieri"
+        except:
+            return str(ts)
 
-        replies_html = ""
-        for r in replies:
-            rid, runame, rcontent, rimg, rparent, rts, rlike_count = r
-            is_reply_liked = request.cookies.get(f"liked_{rid}") == "1"
-            replies_html += render_post(
-                rid, runame, rcontent, rimg, rts, rlike_count, is_reply_liked, [], level=level+1
-            )
+    return fmt
 
-        return f'''
+# ---------- TEMPLATE ----------
+# Il post è una f-string dentro una funzione: Python la compila in bytecode all'import,
+# quindi per ogni post non si analizza nessun template e non si crea nessun dizionario.
+# Testa e coda della pagina si riempiono con format una sola volta per richiesta.
+def post_html(pid, indent, margin_left, border_left, pad_left, author_href, initial, username,
+              time, like_color, like_icon, like_count, reply_label, content, replies_html, img_html=""):
+    return f'''
         {indent}<div class="fiuggi-post" id="post-{pid}" style="margin-left:{margin_left}px; border-left:{border_left}; padding-left:{pad_left}px">
           <div class="fiuggi-header">
-            <div class="fiuggi-avatar">{username[0].upper()}</div>
+            <a class="fiuggi-avatar" href="{author_href}">{initial}</a>
             <div class="fiuggi-meta">
               <strong>{username}</strong>
-              <span class="fiuggi-time">{fmt_ts(ts)}</span>
+              <span class="fiuggi-time">{time}</span>
             </div>
             <div class="fiuggi-actions">
-              <button class="fiuggi-like" data-id="{pid}" onclick="toggleLike({pid})" style="color:{'#FFD166' if is_liked else '#64748B'}">
-                <i class="{'fas fa-heart' if is_liked else 'far fa-heart'}"></i> <span>{like_count}</span>
+              <button class="fiuggi-like" data-id="{pid}" onclick="toggleLike({pid})" style="color:{like_color}">
+                <i class="{like_icon}"></i> <span>{like_count}</span>
               </button>
-              <button class="fiuggi-reply" onclick="toggleReply({pid})">🗨️ Rispondi</button>
+              <button class="fiuggi-reply" onclick="toggleReply({pid})">🗨️ Rispondi{reply_label}</button>
             </div>
           </div>
           <div class="fiuggi-content">{content}</div>
           {img_html}
-          {reply_input}
+          <div class="reply-form mt-2" id="reply-form-{pid}" style="display:none">
+            <input type="text" class="form-control form-control-sm reply-input"
+                   placeholder="La tua risposta…" maxlength="200"
+                   onkeypress="if(event.key==='Enter') submitReply({pid})">
+            <button class="btn-reply" onclick="submitReply({pid})">➤</button>
+          </div>
           <div class="replies" id="replies-{pid}">{replies_html}</div>
         </div>
         '''
 
-    main_posts = [p for p in posts if p[4] is None]
-    html_posts = ""
-    for pid, username, content, image_path, parent_id, ts, like_count in main_posts:
-        is_liked = request.cookies.get(f"liked_{pid}") == "1"
-        replies = replies_by_post.get(pid, [])
-        html_posts += render_post(pid, username, content, image_path, ts, like_count, is_liked, replies)
+EMPTY_FEED_HTML = '''
+    <div class="fiuggi-card" style="text-align:center; padding:50px 20px">
+      <div style="font-size:4rem; margin-bottom:20px">✨</div>
+      <h3 style="font-family:'ClashGrotesk'; font-weight:500; margin-bottom:12px">Nessun momento ancora</h3>
+      <p style="opacity:0.8">Sii il primo a condividere qualcosa di bello.</p>
+    </div>
+    '''
 
-    return f'''
+PAGE_HEAD_TEMPLATE = '''
 <!DOCTYPE html>
 <html lang="it" {theme_attr}>
 <head>
@@ -337,6 +516,21 @@ def render_page(posts, replies_by_post, error=""):
       font-size: 1.1rem;
       flex-shrink: 0;
       margin-right: 14px;
+      text-decoration: none;
+    }}
+    .btn-more {{
+      display: block;
+      text-align: center;
+      color: var(--blue-fiuggi-light);
+      font-family: 'ClashGrotesk';
+      font-weight: 500;
+      text-decoration: none;
+      padding: 12px;
+      border-radius: 14px;
+      transition: all 0.2s;
+    }}
+    .btn-more:hover {{
+      background: rgba(255,209,102,0.15);
     }}
     .fiuggi-meta {{
       flex: 1;
@@ -449,47 +643,25 @@ def render_page(posts, replies_by_post, error=""):
     <h1 class="logo">FiuggiGram</h1>
     <p class="logo-sub">✨ Un piccolo social di Fiuggi</p>
 
-    <div class="fiuggi-card">
-      <form method="POST" enctype="multipart/form-data">
-        <div class="form-group">
-          <input type="text" name="username" class="form-control" placeholder="Il tuo nome" maxlength="16" required autofocus>
-        </div>
-        <div class="form-group">
-          <textarea name="content" class="form-control" rows="3" placeholder="Cosa ti va di condividere oggi?"></textarea>
-        </div>
-        <div class="file-input-wrapper" onclick="document.getElementById('fileInput').click()">
-          <div>📎 Allega un’immagine (opzionale)</div>
-          <input type="file" id="fileInput" name="image" accept="image/*" style="display:none">
-        </div>
-        <div class="form-group">
-          <input type="password" name="code" class="form-control" placeholder="Codice" required>
-        </div>
-        <button type="submit" class="btn-fiuggi">✨ Pubblica</button>
-        {"<div class='error'><i class='fas fa-exclamation-triangle'></i> Codice errato!</div>" if error else ""}
-      </form>
-    </div>
+    {top_html}
 
-    <h2 style="font-family:'ClashGrotesk'; font-weight:500; font-size:1.5rem; color:var(--text); margin:32px 0 20px">📬 I vostri momenti</h2>
+    <h2 style="font-family:'ClashGrotesk'; font-weight:500; font-size:1.5rem; color:var(--text); margin:32px 0 20px">{title}</h2>
     
     <div id="posts-container">
-    {html_posts if html_posts else '''
-    <div class="fiuggi-card" style="text-align:center; padding:50px 20px">
-      <div style="font-size:4rem; margin-bottom:20px">✨</div>
-      <h3 style="font-family:'ClashGrotesk'; font-weight:500; margin-bottom:12px">Nessun momento ancora</h3>
-      <p style="opacity:0.8">Sii il primo a condividere qualcosa di bello.</p>
-    </div>
-    '''}
-    </div>
+'''
+
+PAGE_TAIL_TEMPLATE = '''    </div>
+    {more_html}
 
     <footer>
-      © {datetime.datetime.now().year} FiuggiGram — creato da Alessio
+      © {year} FiuggiGram — creato da Alessio
     </footer>
   </div>
 
   <script src="https://kit.fontawesome.com/a076d05399.js" crossorigin="anonymous"></script>
   <script>
     // Ping per mantenere il server acceso
-    setInterval(() => fetch('/ping').catch(() => {{}}), {PING_INTERVAL_SEC * 1000});
+    setInterval(() => fetch('/ping').catch(() => {{}}), {ping_ms});
 
     function toggleTheme() {{
       const body = document.body;
@@ -569,15 +741,103 @@ def render_page(posts, replies_by_post, error=""):
 </body>
 </html>
     '''
+# ------------------------------------------------------------------------------
 
-@app.route("/", methods=["GET", "POST"])
-def home():
-    conn = get_db_connection()
-    if DB_TYPE == "postgres":
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
+def render_page(threads, error=False, author=None, stats=None, more_url=None):
+    """Genera la pagina a pezzi; `threads` è un iterabile di (post, risposte)."""
+    cookies = request.cookies
+    theme = cookies.get("theme", "auto")
+    theme_attr = f'data-theme="{theme}"' if theme in ("light", "dark") else ''
+    now = datetime.datetime.now()
+    fmt = make_ts_formatter(now)
+
+    def render_post(pid, username, content, image_path, ts, like_count, replies, level=0, reply_count=0):
+        is_liked = cookies.get(f"liked_{pid}") == "1"
+        margin_left = 16 * level
+        replies_html = "".join(
+            render_post(rid, runame, rcontent, rimg, rts, rlike_count, (), level=level+1)
+            for rid, runame, rcontent, rimg, rparent, rts, rlike_count in replies
+        )
+        return post_html(
+            pid=pid,
+            indent="  " * level,
+            margin_left=margin_left,
+            border_left="4px solid #FFD166" if level == 0 else "2px solid #CBD5E1",
+            pad_left=16 - margin_left if level > 0 else 16,
+            author_href=author_url(username),
+            initial=escape(username[0].upper()),
+            username=escape(username),
+            time=fmt(ts),
+            like_color='#FFD166' if is_liked else '#64748B',
+            like_icon='fas fa-heart' if is_liked else 'far fa-heart',
+            like_count=like_count,
+            reply_label=f" · {reply_count}" if reply_count else "",
+            content=content,
+            replies_html=replies_html,
+        )
+
+    if author:
+        # Arriva dall'URL: va sempre escapato
+        initial, author = escape(author[0].upper()), escape(author)
+        post_count, reply_total, like_total = stats or (0, 0, 0)
+        top_html = f'''
+    <div class="fiuggi-card">
+      <div class="fiuggi-header">
+        <div class="fiuggi-avatar">{initial}</div>
+        <div class="fiuggi-meta">
+          <strong>{author}</strong>
+          <span class="fiuggi-time">{post_count} post · {reply_total} risposte · {like_total} ❤</span>
+        </div>
+      </div>
+      <a class="btn-more" href="/">← Torna al feed</a>
+    </div>
+    '''
+        title = f"📬 I momenti di {author}"
     else:
-        cursor = conn.cursor()
+        top_html = f'''
+    <div class="fiuggi-card">
+      <form method="POST" enctype="multipart/form-data">
+        <div class="form-group">
+          <input type="text" name="username" class="form-control" placeholder="Il tuo nome" maxlength="16" required autofocus>
+        </div>
+        <div class="form-group">
+          <textarea name="content" class="form-control" rows="3" placeholder="Cosa ti va di condividere oggi?"></textarea>
+        </div>
+        <div class="file-input-wrapper" onclick="document.getElementById('fileInput').click()">
+          <div>📎 Allega un’immagine (opzionale)</div>
+          <input type="file" id="fileInput" name="image" accept="image/*" style="display:none">
+        </div>
+        <div class="form-group">
+          <input type="password" name="code" class="form-control" placeholder="Codice" required>
+        </div>
+        <button type="submit" class="btn-fiuggi">✨ Pubblica</button>
+        {"<div class='error'><i class='fas fa-exclamation-triangle'></i> Codice errato!</div>" if error else ""}
+      </form>
+    </div>
+    '''
+        title = "📬 I vostri momenti"
 
+    yield PAGE_HEAD_TEMPLATE.format(theme_attr=theme_attr, top_html=top_html, title=title)
+
+    empty = True
+    for (pid, username, content, image_path, parent_id, ts, like_count, *extra), replies in threads:
+        if parent_id is not None:
+            continue
+        empty = False
+        reply_count = extra[0] if extra else len(replies)
+        yield render_post(pid, username, content, image_path, ts, like_count, replies, reply_count=reply_count)
+    if empty:
+        yield EMPTY_FEED_HTML
+
+    more_html = f'<a class="btn-more" href="{more_url}">Carica altri ↓</a>' if more_url else ""
+    yield PAGE_TAIL_TEMPLATE.format(more_html=more_html, year=now.year, ping_ms=PING_INTERVAL_SEC * 1000)
+
+def stream_page(threads, **kwargs):
+    # ✅ Streaming: Flask invia i pezzi mentre le righe vengono ancora lette
+    return Response(stream_with_context(render_page(threads, **kwargs)), mimetype="text/html")
+
+@app.route("/", methods=["GET", "POST"])
+def home():
     if request.method == "POST":
         username = request.form.get("username", "").strip()[:16] or "Amico"
         content = request.form.get("content", "").strip()[:400]
@@ -585,67 +845,69 @@ def home():
         image_path = None
 
         if code != SECRET_JOIN_CODE:
-            conn.close()
-            return render_page([], {}, error=True)
+            return stream_page([], error=True)
 
-        if DB_TYPE == "postgres":
-            cursor.execute(
-                "INSERT INTO posts (username, content, image_path, parent_id) VALUES (%s, %s, %s, NULL)",
-                (username, content, image_path)
-            )
-        else:
-            cursor.execute(
-                "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, ?, NULL)",
-                (username, content, image_path)
-            )
-        conn.commit()
-        conn.close()
+        def insert_post(conn):
+            cursor = conn.cursor()
+            if DB_TYPE == "postgres":
+                cursor.execute(
+                    "INSERT INTO posts (username, content, image_path, parent_id) VALUES (%s, %s, %s, NULL)",
+                    (username, content, image_path)
+                )
+            else:
+                cursor.execute(
+                    "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, ?, NULL)",
+                    (username, content, image_path)
+                )
+            bump_author_stats(cursor, username, posts=1)
+
+        run_write(insert_post)
 
         # ✅ REDIRECT DOPO IL POST → evita duplicati su refresh
         return redirect(url_for("home"))
 
-    # Solo GET: carica i post
-    if DB_TYPE == "postgres":
-        cursor.execute("""
-            SELECT p.id, p.username, p.content, p.image_path, p.parent_id, p.timestamp,
-                   (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count
-            FROM posts p
-            WHERE p.parent_id IS NULL
-            ORDER BY p.timestamp DESC
-        """)
-    else:
-        cursor.execute("""
-            SELECT p.id, p.username, p.content, p.image_path, p.parent_id, p.timestamp,
-                   (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count
-            FROM posts p
-            WHERE p.parent_id IS NULL
-            ORDER BY p.timestamp DESC
-        """)
-    posts = cursor.fetchall()
+    # Solo GET: i post vengono letti a blocchi mentre la pagina è già in invio
+    return stream_page(iter_feed(), error=False)
 
-    replies_by_post = {}
-    for row in posts:
-        pid = row['id'] if DB_TYPE == "postgres" else row[0]
-        if DB_TYPE == "postgres":
-            cursor.execute("""
-                SELECT id, username, content, image_path, parent_id, timestamp,
-                       (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count
-                FROM posts p
-                WHERE p.parent_id = %s
-                ORDER BY timestamp ASC
-            """, (pid,))
-        else:
-            cursor.execute("""
-                SELECT id, username, content, image_path, parent_id, timestamp,
+def iter_feed():
+    """Produce (post, risposte) a pagine keyset di FEED_BATCH_SIZE post."""
+    # La connessione si apre solo quando lo stream parte davvero, e tra una pagina
+    # e l'altra non resta aperta nessuna SELECT: niente lock tenuti durante l'invio
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        p = "%s" if DB_TYPE == "postgres" else "?"
+        keyset = ""
+        params = []
+        while True:
+            cursor.execute(f"""
+                SELECT p.id, p.username, p.content, p.image_path, p.parent_id, p.timestamp,
                        (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count
                 FROM posts p
-                WHERE p.parent_id = ?
-                ORDER BY timestamp ASC
-            """, (pid,))
-        replies_by_post[pid] = cursor.fetchall()
-
-    conn.close()
-    return render_page(posts, replies_by_post, error=False)
+                WHERE p.parent_id IS NULL {keyset}
+                ORDER BY p.timestamp DESC, p.id DESC
+                LIMIT {p}
+            """, params + [FEED_BATCH_SIZE])
+            rows = cursor.fetchall()
+            threads = []
+            for row in rows:
+                cursor.execute(f"""
+                    SELECT id, username, content, image_path, parent_id, timestamp,
+                           (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count
+                    FROM posts p
+                    WHERE p.parent_id = {p}
+                    ORDER BY timestamp ASC
+                """, (row[0],))
+                threads.append((row, cursor.fetchall()))
+            # Chiude la transazione di lettura (Postgres) prima di cedere al client
+            conn.commit()
+            yield from threads
+            if len(rows) < FEED_BATCH_SIZE:
+                break
+            keyset = f"AND (p.timestamp, p.id) < ({p}, {p})"
+            params = [rows[-1][5], rows[-1][0]]
+    finally:
+        conn.close()
 
 @app.route("/reply", methods=["POST"])
 def reply():
@@ -657,66 +919,121 @@ def reply():
     if not post_id or not content:
         return {"success": False}, 400
 
-    conn = get_db_connection()
-    if DB_TYPE == "postgres":
+    def insert_reply(conn):
         cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO posts (username, content, image_path, parent_id) VALUES (%s, %s, NULL, %s)",
-            (username, content, post_id)
-        )
-    else:
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, NULL, ?)",
-            (username, content, post_id)
-        )
-    conn.commit()
-    conn.close()
+        if DB_TYPE == "postgres":
+            cursor.execute(
+                "INSERT INTO posts (username, content, image_path, parent_id) VALUES (%s, %s, NULL, %s)",
+                (username, content, post_id)
+            )
+        else:
+            cursor.execute(
+                "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, NULL, ?)",
+                (username, content, post_id)
+            )
+        bump_author_stats(cursor, username, replies=1)
+
+    run_write(insert_reply)
     return {"success": True}
 
 @app.route("/like/<int:post_id>", methods=["POST"])
 def like_post(post_id):
-    conn = get_db_connection()
-    if DB_TYPE == "postgres":
-        cursor = conn.cursor()
-    else:
-        cursor = conn.cursor()
     client_id = get_client_id()
+    p = "%s" if DB_TYPE == "postgres" else "?"
 
-    if DB_TYPE == "postgres":
-        cursor.execute("SELECT 1 FROM likes WHERE post_id = %s AND ip_hash = %s", (post_id, client_id))
-        exists = cursor.fetchone()
-        if exists:
-            cursor.execute("DELETE FROM likes WHERE post_id = %s AND ip_hash = %s", (post_id, client_id))
-            liked = False
-        else:
-            cursor.execute("INSERT INTO likes (post_id, ip_hash) VALUES (%s, %s)", (post_id, client_id))
-            liked = True
-        conn.commit()
-        cursor.execute("SELECT COUNT(*) FROM likes WHERE post_id = %s", (post_id,))
-        count = cursor.fetchone()[0]
-    else:
-        cursor.execute("SELECT 1 FROM likes WHERE post_id = ? AND ip_hash = ?", (post_id, client_id))
+    def toggle_like(conn):
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT 1 FROM likes WHERE post_id = {p} AND ip_hash = {p}", (post_id, client_id))
         exists = cursor.fetchone()
         if exists:
-            cursor.execute("DELETE FROM likes WHERE post_id = ? AND ip_hash = ?", (post_id, client_id))
+            cursor.execute(f"DELETE FROM likes WHERE post_id = {p} AND ip_hash = {p}", (post_id, client_id))
             liked = False
         else:
-            cursor.execute("INSERT INTO likes (post_id, ip_hash) VALUES (?, ?)", (post_id, client_id))
+            cursor.execute(f"INSERT INTO likes (post_id, ip_hash) VALUES ({p}, {p})", (post_id, client_id))
             liked = True
-        conn.commit()
-        cursor.execute("SELECT COUNT(*) FROM likes WHERE post_id = ?", (post_id,))
-        count = cursor.fetchone()[0]
+        cursor.execute(f"SELECT username FROM posts WHERE id = {p}", (post_id,))
+        owner = cursor.fetchone()
+        if owner:
+            bump_author_stats(cursor, owner[0], likes=1 if liked else -1)
+        cursor.execute(f"SELECT COUNT(*) FROM likes WHERE post_id = {p}", (post_id,))
+        return liked, cursor.fetchone()[0]
 
-    conn.close()
+    liked, count = run_write(toggle_like)
     return {"success": True, "liked": liked, "count": count}
 
+@app.route("/u/<path:username>")
+def author_timeline(username):
+    # Paginazione keyset su (timestamp, id): niente OFFSET, usa idx_posts_username_ts
+    before = request.args.get("before")
+    before_id = request.args.get("before_id", type=int)
+    as_json = request.args.get("format") == "json" or \
+        request.accept_mimetypes.best == "application/json"
+
+    p = "%s" if DB_TYPE == "postgres" else "?"
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT post_count, reply_count, like_total FROM author_stats WHERE username = {p}",
+            (username,)
+        )
+        stats = cursor.fetchone() or (0, 0, 0)
+
+        keyset = ""
+        params = [username]
+        if before and before_id is not None:
+            keyset = f"AND (p.timestamp, p.id) < ({p}, {p})"
+            params += [before, before_id]
+        params.append(AUTHOR_PAGE_SIZE + 1)
+        cursor.execute(f"""
+            SELECT p.id, p.username, p.content, p.image_path, p.parent_id, p.timestamp,
+                   (SELECT COUNT(*) FROM likes l WHERE l.post_id = p.id) as like_count,
+                   (SELECT COUNT(*) FROM posts r WHERE r.parent_id = p.id) as reply_count
+            FROM posts p
+            WHERE p.username = {p} AND p.parent_id IS NULL {keyset}
+            ORDER BY p.timestamp DESC, p.id DESC
+            LIMIT {p}
+        """, params)
+        posts = cursor.fetchall()
+    finally:
+        conn.close()
+
+    has_more = len(posts) > AUTHOR_PAGE_SIZE
+    posts = posts[:AUTHOR_PAGE_SIZE]
+    next_cursor = None
+    if has_more:
+        last = posts[-1]
+        next_cursor = {"before": str(last[5]), "before_id": last[0]}
+
+    if as_json:
+        return {
+            "username": username,
+            "stats": {"posts": stats[0], "replies": stats[1], "likes": stats[2]},
+            "posts": [
+                {
+                    "id": pid,
+                    "content": content,
+                    "image_path": image_path,
+                    "timestamp": str(ts),
+                    "like_count": like_count,
+                    "reply_count": reply_count,
+                }
+                for pid, _, content, image_path, _, ts, like_count, reply_count in posts
+            ],
+            "next": next_cursor,
+        }
+
+    more_url = None
+    if next_cursor:
+        more_url = f"{author_url(username)}?before={quote(next_cursor['before'])}&before_id={next_cursor['before_id']}"
+    return stream_page(((row, ()) for row in posts), author=username, stats=stats, more_url=more_url)
+
 @app.route("/ping")
 def ping():
     return "", 200
 
-if not os.path.exists("/tmp/fiuggigram.db"):
-    init_db()
+# Sempre: le CREATE sono idempotenti e aggiungono indici/tabelle ai db esistenti
+init_db()
 
 if __name__ == "__main__":
     port = int(os.environ.get("PORT", 5000))
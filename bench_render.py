@@ -0,0 +1,73 @@
+"""Benchmark rendering: memoria di picco e tempo per lo stream del feed al variare dei post.
+
+    python bench_render.py [--sizes 200 2000 20000] [--replies 2]
+
+Ogni dimensione gira in un processo separato su un database temporaneo nuovo.
+La memoria di picco (tracemalloc) dovrebbe restare piatta al crescere del feed.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+
+def run_size(args):
+    # Import dopo aver impostato le variabili d'ambiente nel processo figlio
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as fiuggi
+
+    def seed(conn):
+        cursor = conn.cursor()
+        cursor.executemany(
+            "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, NULL, NULL)",
+            [(f"u{i % 10}", "x" * 200) for i in range(args.size)],
+        )
+        cursor.executemany(
+            "INSERT INTO posts (username, content, image_path, parent_id) VALUES (?, ?, NULL, ?)",
+            [("Tu", "r" * 80, 1 + i % args.size) for i in range(args.size * args.replies)],
+        )
+
+    fiuggi.run_write(seed)
+
+    with fiuggi.app.test_request_context("/"):
+        chunks = fiuggi.home().response
+        tracemalloc.start()
+        start = time.perf_counter()
+        total = sum(len(chunk) for chunk in chunks)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    print(json.dumps({"bytes": total, "peak": peak, "seconds": elapsed}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[200, 2000, 20000])
+    parser.add_argument("--replies", type=int, default=2)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.size is not None:
+        run_size(args)
+        return
+
+    print(f"{'post':>8}{'HTML KiB':>12}{'picco KiB':>12}{'secondi':>10}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, FIUGGI_DB_PATH=os.path.join(tmp, "bench.db"))
+            env.pop("DATABASE_URL", None)
+            out = subprocess.run(
+                [sys.executable, __file__, "--size", str(size), "--replies", str(args.replies)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            print(f"{size:>8}{result['bytes'] // 1024:>12}{result['peak'] // 1024:>12}{result['seconds']:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
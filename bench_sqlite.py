@@ -0,0 +1,99 @@
+"""Benchmark SQLite: throughput di letture e scritture con FIUGGI_SQLITE_TUNED on/off.
+
+    python bench_sqlite.py [--seconds 5] [--readers 8] [--writers 4]
+
+Ogni modalità gira in un processo separato (la configurazione è letta all'import
+di app.py) su un database temporaneo nuovo.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+SEED_POSTS = 200
+
+
+def run_mode(args):
+    # Import dopo aver impostato le variabili d'ambiente nel processo figlio
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as fiuggi
+
+    client = fiuggi.app.test_client()
+    for i in range(SEED_POSTS):
+        client.post("/", data={"username": f"u{i % 10}", "content": f"post {i}", "code": fiuggi.SECRET_JOIN_CODE})
+
+    stop = time.perf_counter() + args.seconds
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader(n):
+        c = fiuggi.app.test_client()
+        done = errors = 0
+        while time.perf_counter() < stop:
+            r = c.get(f"/u/u{n % 10}?format=json")
+            done += 1
+            errors += r.status_code != 200
+        with lock:
+            counts["reads"] += done
+            counts["errors"] += errors
+
+    def writer(n):
+        c = fiuggi.app.test_client()
+        done = errors = 0
+        i = 0
+        while time.perf_counter() < stop:
+            if i % 2:
+                r = c.post(f"/like/{1 + i % SEED_POSTS}", headers={"X-Forwarded-For": f"10.0.{n}.{i % 250}"})
+            else:
+                r = c.post("/reply", json={"post_id": 1 + i % SEED_POSTS, "content": f"reply {i}"})
+            i += 1
+            done += 1
+            errors += r.status_code != 200
+        with lock:
+            counts["writes"] += done
+            counts["errors"] += errors
+
+    threads = [threading.Thread(target=reader, args=(n,)) for n in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(n,)) for n in range(args.writers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    print(json.dumps({k: v / args.seconds if k != "errors" else v for k, v in counts.items()}))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=5)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--mode", choices=["0", "1"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode is not None:
+        # Le eccezioni "database is locked" finiscono come 500 nel conteggio errori
+        run_mode(args)
+        return
+
+    print(f"{'modalità':<10}{'letture/s':>12}{'scritture/s':>14}{'errori':>9}")
+    for mode in ("0", "1"):
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, FIUGGI_SQLITE_TUNED=mode, FIUGGI_DB_PATH=os.path.join(tmp, "bench.db"))
+            env.pop("DATABASE_URL", None)
+            out = subprocess.run(
+                [sys.executable, __file__, "--mode", mode, "--seconds", str(args.seconds),
+                 "--readers", str(args.readers), "--writers", str(args.writers)],
+                env=env, capture_output=True, text=True, check=True,
+            )
+            result = json.loads(out.stdout.strip().splitlines()[-1])
+            label = "tuned" if mode == "1" else "default"
+            print(f"{label:<10}{result['reads']:>12.0f}{result['writes']:>14.0f}{result['errors']:>9}")
+
+
+if __name__ == "__main__":
+    main()
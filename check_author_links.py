@@ -0,0 +1,53 @@
+"""Controllo: ogni link avatar del feed apre la pagina del suo autore.
+
+    python check_author_links.py
+
+Gira su un database temporaneo nuovo; esce con codice 1 al primo link rotto.
+"""
+import os
+import re
+import sys
+import tempfile
+from html import unescape
+
+NAMES = ["ale", "a/b", "a/../b", "anna maria", "50%", "a?b#c", "zoë", "<b>x"]
+
+
+def main():
+    tmp = tempfile.mkdtemp()
+    os.environ["FIUGGI_DB_PATH"] = os.path.join(tmp, "check.db")
+    os.environ.pop("DATABASE_URL", None)
+    # Import dopo aver impostato il database temporaneo
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    import app as fiuggi
+
+    client = fiuggi.app.test_client()
+    for name in NAMES:
+        client.post("/", data={"username": name, "content": "ciao", "code": fiuggi.SECRET_JOIN_CODE})
+
+    feed = client.get("/").get_data(as_text=True)
+    links = re.findall(r'<a class="fiuggi-avatar" href="([^"]+)">', feed)
+    failures = 0
+    for name in NAMES:
+        href = fiuggi.author_url(name)
+        if href not in links:
+            print(f"FAIL {name!r}: {href} non è nel feed")
+            failures += 1
+            continue
+        page = client.get(href, query_string={"format": "json"})
+        data = page.get_json(silent=True) or {}
+        if page.status_code != 200 or data.get("username") != name or not data.get("posts"):
+            print(f"FAIL {name!r}: {href} -> {page.status_code} {data.get('username')!r}")
+            failures += 1
+            continue
+        html = client.get(href).get_data(as_text=True)
+        if f"<strong>{name}</strong>" not in unescape(html):
+            print(f"FAIL {name!r}: nome non mostrato nella pagina autore")
+            failures += 1
+            continue
+        print(f"ok   {name!r}: {href}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()